@@ -60,6 +60,7 @@ setup(
         'tqdm >4.21',
         'aiohttp',
         'tqdm>=4.21.0',
+        'importlib_metadata; python_version < "3.8"',
     ],
     tests_require=[
         'networkx>=2',
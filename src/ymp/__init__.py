@@ -1,17 +1,33 @@
 import os
-import sys
 import warnings
+from typing import TYPE_CHECKING
+
+
+def get_scm_version() -> str:
+    """Determine the version from the source checkout using setuptools_scm
+
+    Only needed when running from a source tree that was neither
+    installed nor built (i.e. has no ``_version.py`` and no package
+    metadata).
+    """
+    from setuptools_scm import get_version
+    return get_version(root="..", relative_to=__file__)
 
 
 try:
     from ymp._version import version as __version__
 except ModuleNotFoundError:
-    from pkg_resources import get_distribution, DistributionNotFound
     try:
-        __version__ = get_distribution(__name__).version
-    except DistributionNotFound:
-        from setuptools_scm import get_version
-        __version__ = get_version(root="..", relative_to=__file__)
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:  # Python < 3.8
+        from importlib_metadata import version, PackageNotFoundError
+    try:
+        __version__ = version(__name__)
+    except PackageNotFoundError:
+        __version__ = None
+
+if __version__ is None:
+    __version__ = get_scm_version()
 
 
 try:
@@ -31,11 +47,9 @@ _snakefile = os.path.join(_rule_dir, "Snakefile")
 _defaults_file = os.path.join(_etc_dir, "defaults.yml")
 _env_dir = os.path.join(_rsc_dir, "conda_envs")
 
-# import ymp.config for type hints below
-# (this import will eventually access the path variables above, so moving
-# it further up breaks docs build)
-if 'sphinx' in sys.modules:
-    import ymp.config
+# only imported for the 'config.ConfigMgr' forward reference below
+if TYPE_CHECKING:
+    from ymp import config
 
 
 #: Set to 1 to show the YMP expansion process as it is applied to the next
@@ -28,9 +28,12 @@ The extension also provides an autodoc-like directive:
 
 """
 
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 from textwrap import dedent, indent
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 
 from docutils import nodes
 from docutils.parsers import rst
@@ -63,7 +66,10 @@ except AttributeError:
 #: str: Path in which YMP package is located
 BASEPATH = os.path.dirname(os.path.dirname(ymp.__file__))
 
+_strip_ws = ws_re.sub
 
+
+@functools.lru_cache(maxsize=1024)
 def relpath(path: str) -> str:
     """Make absolute path relative to BASEPATH
 
@@ -76,6 +82,17 @@ def relpath(path: str) -> str:
     return os.path.relpath(path, BASEPATH)
 
 
+def findall(node: nodes.Node, condition) -> Iterator[nodes.Node]:
+    """Iterate over nodes in tree below ``node`` matching ``condition``
+
+    Uses the lazy ``findall`` if available (docutils >= 0.18) and
+    falls back to ``traverse`` otherwise.
+    """
+    if hasattr(node, 'findall'):
+        return node.findall(condition)
+    return iter(node.traverse(condition))
+
+
 class YmpObjectDescription(ObjectDescription):
     """
     Base class for RSt directives in SnakemakeDomain
@@ -110,25 +127,28 @@ class YmpObjectDescription(ObjectDescription):
         signode += addnodes.desc_annotation(self.typename, self.typename+" ")
         signode += addnodes.desc_name(sig, sig)
 
-        if 'source' in self.options:
-            self.add_source_link(signode)
+        source = self.options.get('source')
+        if source:
+            self.add_source_link(signode, source)
 
-        sigid = ws_re.sub('', sig)
+        sigid = _strip_ws('', sig)
         return sigid
 
-    def add_source_link(self, signode: addnodes.desc) -> None:
+    def add_source_link(self, signode: addnodes.desc, source: str) -> None:
         """
         Add link to source code to *signode*
+
+        Args:
+          signode: Node created for object signature
+          source: Source position as ``file:line``
         """
-        filename, lineno = self.options['source'].split(':')
-        if not hasattr(self.env, '_snakefiles'):
-            self.env._snakefiles = set()
+        filename, lineno = source.split(':')
         self.env._snakefiles.add(filename)
 
         onlynode = addnodes.only(expr='html')  # show only in html
         onlynode += nodes.reference(
             '',
-            refuri='_snakefiles/{}.html#line-{}'.format(filename, lineno)
+            refuri=f'_snakefiles/{filename}.html#line-{lineno}'
         )
         onlynode[0] += nodes.inline('', '[source]',
                                     classes=['viewcode-link'])
@@ -212,25 +232,23 @@ class SnakemakeDomain(Domain):
 
     def clear_doc(self, docname: str):
         """Delete objects derived from file ``docname``"""
-        if 'objects' in self.data:
-            toremove = [
-                key
-                for (key, (docname_, _)) in self.data['objects'].items()
-                if docname_ == docname
-            ]
-            for key in toremove:
-                del self.data['objects'][key]
+        objects = self.data.get('objects')
+        if objects:
+            self.data['objects'] = {
+                key: value
+                for key, value in objects.items()
+                if value[0] != docname
+            }
 
     def resolve_xref(self, env: BuildEnvironment, fromdocname: str,
                      builder, typ, target, node, contnode):
         objects = self.data['objects']
-        objtypes = self.objtypes_for_role(typ)
-        for objtype in objtypes:
-            if (objtype, target) in objects:
-                return make_refnode(builder, fromdocname,
-                                    objects[objtype, target][0],
-                                    objects[objtype, target][1],
-                                    contnode, target + ' ' + objtype)
+        for objtype in self.objtypes_for_role(typ) or ():
+            entry = objects.get((objtype, target))
+            if entry is not None:
+                docname, labelid = entry
+                return make_refnode(builder, fromdocname, docname, labelid,
+                                    contnode, f"{target} {objtype}")
 
     def get_objects(self):
         for (typ, name), (docname, ref) in self.data['objects'].items():
@@ -304,33 +322,32 @@ class AutoSnakefileDirective(rst.Directive):
         Retuns:
           StringList containing formatted Rule documentation
         """
-        head = self.tpl_rule.format(name=rule.name)
+        prefix = " " * idt
+        headlines = [prefix + self.tpl_rule.format(name=rule.name)]
         if rule.lineno:
-            head += "\n"
-            head += self.tpl_source.format(
+            headlines.append(prefix + self.tpl_source.format(
                 filename=relpath(rule.snakefile),
                 lineno=self.workflow.linemaps[rule.snakefile][rule.lineno],
-            )
-        head = indent(head, " " * idt)
-        headlines = head.splitlines()
+            ))
         doc = self.parse_doc(rule.docstring, rule.snakefile, idt+3)
 
-        return StringList(headlines, rule.snakefile) + doc
+        res = StringList(headlines, rule.snakefile)
+        res.extend(doc)
+        return res
 
     def parse_stage(self, stage: Stage, idt: int=0) -> StringList:
-        head = self.tpl_stage.format(name=stage.name)
+        prefix = " " * idt
+        headlines = [prefix + self.tpl_stage.format(name=stage.name)]
         if stage.lineno:
-            head += "\n"
-            head += self.tpl_source.format(
+            headlines.append(prefix + self.tpl_source.format(
                 filename=relpath(stage.filename),
                 lineno=self.workflow.linemaps[stage.filename][stage.lineno],
-            )
-        head = indent(head, " " * idt)
-        headlines = head.splitlines()
+            ))
         doc = self.parse_doc(stage.docstring, stage.filename, idt+3)
 
-        res = StringList(headlines, stage.filename) + doc
-        for rule in sorted(stage.rules, key=lambda s: s.name):
+        res = StringList(headlines, stage.filename)
+        res.extend(doc)
+        for rule in sorted(stage.rules, key=attrgetter('name')):
             res.extend(self.parse_rule(rule, idt+3))
         return res
 
@@ -340,10 +357,9 @@ class AutoSnakefileDirective(rst.Directive):
         result = StringList()
 
         # generate stages
-        stages = Stage.get_registry().values()
-        stages = list(set(stages))
-        stages = sorted(stages, key=lambda x: x.name)
-        for stage in stages:
+        # registry lists stages under both name and altname
+        stages = dict.fromkeys(Stage.get_registry().values())
+        for stage in sorted(stages, key=attrgetter('name')):
             result.extend(self.parse_stage(stage))
 
         # generate nodes for rules not registered with stages
@@ -356,28 +372,50 @@ class AutoSnakefileDirective(rst.Directive):
         return [node]
 
 
+def read_snakefile(snakefile: str) -> str:
+    """Read Snakefile
+
+    Args:
+      snakefile: Snakefile path relative to BASEPATH
+
+    Returns:
+      Content of ``snakefile``
+    """
+    with open(os.path.join(BASEPATH, snakefile), 'rb') as f:
+        return f.read().decode('utf-8')
+
+
 def collect_pages(app: Sphinx):
     """Add Snakefiles to documentation (in HTML mode)
     """
-    if not hasattr(app.env, '_snakefiles'):
+    if not app.env._snakefiles:
         return
 
     highlight_block = app.builder.highlighter.highlight_block
 
-    for snakefile in app.env._snakefiles:
-        try:
-            with open(os.path.join(BASEPATH, snakefile), 'r') as f:
-                code = f.read()
-        except IOError:
-            logger.error("failed to open {}".format(snakefile))
-            continue
-        highlighted = highlight_block(code, 'snakemake', lineanchors="line")
-        context = {
-            'title': snakefile,
-            'body': '<h1>Snakefile "{}"</h1>'.format(snakefile) +
-            highlighted
-        }
-        yield (os.path.join('_snakefiles', snakefile), context, 'page.html')
+    # Read files in background threads while we highlight. The
+    # highlighting itself stays in this thread.
+    snakefiles = sorted(app.env._snakefiles)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(read_snakefile, snakefile)
+            for snakefile in snakefiles
+        ]
+        for snakefile, future in zip(snakefiles, futures):
+            try:
+                code = future.result()
+            except IOError:
+                logger.error("failed to open {}".format(snakefile))
+                continue
+            highlighted = highlight_block(code, 'snakemake',
+                                          lineanchors="line")
+            context = {
+                'title': snakefile,
+                'body': '<h1>Snakefile "{}"</h1>'.format(snakefile) +
+                highlighted
+            }
+            yield (os.path.join('_snakefiles', snakefile), context,
+                   'page.html')
 
     html = ['\n']
     context = {
@@ -421,6 +459,12 @@ class DomainTocTreeCollector(EnvironmentCollector):
         the TOC.
         """
 
+        #: Maps anchor names in the TOC of the current document to the
+        #: TOC entry referencing them
+        self.toc_refs = self.collect_toc_refs(app.env.tocs[app.env.docname])
+        #: Maps ``id()`` of nodes in ``doctree`` to the result of `get_ref`
+        self.node_refs = {}
+
         # FIXME: handle duplicate entries
         for node in self.select_doc_nodes(doctree):
             tocnode = self.select_toc_location(app, node)
@@ -430,13 +474,13 @@ class DomainTocTreeCollector(EnvironmentCollector):
 
             self.toc_insert(app.env.docname, tocnode, node, heading)
 
-    def select_doc_nodes(self, doctree: nodes.Node) -> List[nodes.Node]:
+    def select_doc_nodes(self, doctree: nodes.Node) -> Iterator[nodes.Node]:
         """Select the nodes for which entries in the TOC are desired
 
         This is a separate method so that it might be overriden by
         subclasses wanting to add other types of nodes to the TOC.
         """
-        return doctree.traverse(addnodes.desc)
+        return findall(doctree, addnodes.desc)
 
     def select_toc_location(self, app: Sphinx,
                             node: nodes.Node) -> nodes.Node:
@@ -450,19 +494,30 @@ class DomainTocTreeCollector(EnvironmentCollector):
             node = node.parent
         return app.env.tocs[app.env.docname][0]
 
-    def locate_in_toc(self, app: Sphinx,
-                      node: nodes.Node) -> Optional[nodes.Node]:
-        toc = app.env.tocs[app.env.docname]
-        ref = self.get_ref(node)
-        for node in toc.traverse(nodes.reference):
+    def collect_toc_refs(self, toc: nodes.Node) -> Dict[str, nodes.Node]:
+        """Map anchor names referenced in ``toc`` to their TOC entries"""
+        toc_refs = {}
+        for node in findall(toc, nodes.reference):
             node_ref = node.get('anchorname')
             if not node_ref or node_ref[0] != "#":
                 continue
-            if node_ref[1:] == ref:
-                return node.parent.parent
+            toc_refs.setdefault(node_ref[1:], node.parent.parent)
+        return toc_refs
+
+    def locate_in_toc(self, app: Sphinx,
+                      node: nodes.Node) -> Optional[nodes.Node]:
+        return self.toc_refs.get(self.get_ref(node))
 
     def get_ref(self, node: nodes.Node) -> Optional[nodes.Node]:
+        # All nodes on the path up to the first node with an ID share
+        # the result, so remember it for each of them.
+        visited = []
+        ref = None
         while node is not None:
+            if id(node) in self.node_refs:
+                ref = self.node_refs[id(node)]
+                break
+            visited.append(id(node))
             if not node.get('ids'):
                 # In Sphinx domain descriptions, the ID is in the
                 # first child node, the desc_signature.
@@ -473,8 +528,12 @@ class DomainTocTreeCollector(EnvironmentCollector):
                 if node[0].get('ids'):
                     node['ids'] = [node[0].get('ids')[0] + '-tocentry']
             if node.get('ids'):
-                return node['ids'][0]
+                ref = node['ids'][0]
+                break
             node = node.parent
+        for key in visited:
+            self.node_refs[key] = ref
+        return ref
 
     def make_heading(self, node: nodes.Node) -> List[nodes.Node]:
         names = node[0].traverse(addnodes.desc_name)
@@ -490,13 +549,26 @@ class DomainTocTreeCollector(EnvironmentCollector):
             blist = nodes.bullet_list('')
             tocnode += blist
 
+        ref = self.get_ref(node)
         reference = nodes.reference(
             '', '', internal=True, refuri=docname,
-            anchorname="#" + self.get_ref(node), *heading)
+            anchorname="#" + ref, *heading)
         para = addnodes.compact_paragraph('', '', reference)
         item = nodes.list_item('', para)
         # FIXME: find correct location
         blist.append(item)
+        self.toc_refs.setdefault(ref, item)
+
+
+def init_env(app: Sphinx):
+    """Initialize our data in the build environment
+
+    The environment may have been restored from a previous build,
+    so only add what is missing.
+    """
+    if not hasattr(app.env, '_snakefiles'):
+        # Set of Snakefiles referenced by source links
+        app.env._snakefiles = set()
 
 
 def setup(app: Sphinx):
@@ -505,4 +577,5 @@ def setup(app: Sphinx):
     app.add_domain(SnakemakeDomain)
     app.add_directive('autosnake', AutoSnakefileDirective)
     app.add_env_collector(DomainTocTreeCollector)
+    app.connect('builder-inited', init_env)
     app.connect('html-collect-pages', collect_pages)
@@ -10,7 +10,7 @@ import os
 from typing import Dict, List, Set
 
 from ymp.stage import StageStack, find_stage
-from ymp.stage.base import ConfigStage
+from ymp.stage.base import BaseStage, ConfigStage
 from ymp.exceptions import YmpConfigError
 
 
@@ -31,11 +31,33 @@ class Pipeline(ConfigStage):
               - stage_2
               - stage_3
     """
+    # Declared on the class so that instances unpickled from caches
+    # written before these attributes were added still have them.
+    _stages: List[BaseStage] = None
+    _pipeline: str = None
+
     def __init__(self, name: str, cfg: List[str]) -> None:
         super().__init__(name, cfg)
         self.stage_names: List[str] = cfg
         self._outputs: Dict[str, str] = None
 
+    @property
+    def stages(self) -> List[BaseStage]:
+        """The stages comprising this pipeline
+
+        Resolved from `stage_names` on first access.
+        """
+        if self._stages is None:
+            self._stages = [find_stage(name) for name in self.stage_names]
+        return self._stages
+
+    def __getstate__(self):
+        # Don't pickle the resolved stages. Unpickled, they would be
+        # copies detached from the live stage registry.
+        state = self.__dict__.copy()
+        state.pop('_stages', None)
+        return state
+
     @property
     def outputs(self) -> Dict[str, str]:
         """The outputs of a pipeline are the sum of the outputs
@@ -46,8 +68,7 @@ class Pipeline(ConfigStage):
         """
         outputs = {}
         path = ""
-        for stage_name in self.stage_names:
-            stage = find_stage(stage_name)
+        for stage_name, stage in zip(self.stage_names, self.stages):
             path = ".".join((path, stage_name))
             stage_outputs = stage.outputs
             if isinstance(stage_outputs, set):
@@ -68,8 +89,11 @@ class Pipeline(ConfigStage):
         }
 
     @property
-    def pipeline(self):
-        return "." + ".".join(self.stage_names)
+    def pipeline(self) -> str:
+        """The path suffix formed by the component stages"""
+        if self._pipeline is None:
+            self._pipeline = "." + ".".join(self.stage_names)
+        return self._pipeline
 
     def get_path(self, stack):
         prefix = stack.name.rsplit('.',1)[0]
@@ -1,6 +1,8 @@
 import logging
 import copy
 
+from itertools import accumulate
+
 import ymp
 from ymp.stage.stage import Stage
 from ymp.stage.groupby import GroupBy
@@ -149,20 +151,27 @@ class StageStack(object):
         """
 
     def _do_resolve_prevs(self, stage, inputs, exclude_self):
-        stage_names = copy.copy(self.stage_names)
+        stage_names = self.stage_names
+        stages = self.stages
         if exclude_self:
-            stage_names.pop()
+            stage_names = stage_names[:-1]
+            stages = stages[:-1]
+
+        # prefixes[n] is the path of the stack ending with stage_names[n]
+        prefixes = list(accumulate(stage_names,
+                                   lambda path, name: path + "." + name))
 
         prevs = {}
-        while stage_names and inputs:
-            path = ".".join(stage_names)
-            prev_stage = find_stage(stage_names.pop())
-            prev_stack = self.get(path, prev_stage)
+        for idx in reversed(range(len(stage_names))):
+            if not inputs:
+                break
+            prev_stage = stages[idx]
+            prev_stack = self.get(prefixes[idx], prev_stage)
             provides = stage.satisfy_inputs(prev_stage, inputs)
             for typ, path in provides.items():
                 if path:
-                    path = ".".join(stage_names) + path
-                    prev_stack = self.get(path)
+                    prefix = prefixes[idx - 1] if idx else ""
+                    prev_stack = self.get(prefix + path)
                 prevs[typ] = prev_stack
         return prevs
 
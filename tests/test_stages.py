@@ -11,14 +11,13 @@ def get_targets():
     stages = Stage.get_registry()
 
     ympmakedoc = ">>> ymp make "
-    stage_testcount = {stage: 0 for stage in stages}
+    prefix_len = len(ympmakedoc)
     targets = []
     for stage in stages.values():
         for line in stage.docstring.splitlines():
-            if line.strip().startswith(ympmakedoc):
-                stage_testcount[stage.name] += 1
-                target = line.strip()[len(ympmakedoc):]
-                targets.append(target)
+            line = line.strip()
+            if line.startswith(ympmakedoc):
+                targets.append(line[prefix_len:])
     return targets
 
 